@@ -0,0 +1,263 @@
+# === ATTENDANCE REPORTS ===
+# Rollup tables kept up to date by SQLite triggers, so reports never
+# have to scan the raw `attendance` table (one row per mark, duplicates included).
+#
+#   sessions            -> one row per class session (opened by "Start New Session")
+#   daily_attendance    -> one row per student per day
+#   session_attendance  -> one row per student per session
+
+import sqlite3
+from datetime import date, datetime
+from pathlib import Path
+from flask import Blueprint, jsonify, request
+
+BASE_DIR = Path(__file__).resolve().parent
+DB_PATH = BASE_DIR / "attendance_system.db"
+
+# Rollup layout version, kept in PRAGMA user_version. Bump it when the rollup
+# tables or triggers change; ensure_schema() then drops and rebuilds them.
+ROLLUP_VERSION = 3
+
+# Session a mark belongs to: the latest session of that day started at or
+# before the mark (falls back to the day's first session).
+_SESSION_OF = """COALESCE(
+            (SELECT MAX(id) FROM sessions WHERE date = {0}.date AND start_time <= {0}.time),
+            (SELECT MIN(id) FROM sessions WHERE date = {0}.date))"""
+
+# Per-session rollup rows recomputed from raw marks; {0} filters `attendance a`.
+_SESSION_ROLLUP = """INSERT INTO session_attendance (session_id, student_id, date, first_time, marks)
+            SELECT session_id, student_id, date, MIN(time), COUNT(*)
+            FROM (SELECT """ + _SESSION_OF.format("a") + """ AS session_id, student_id, date, time
+                  FROM attendance a {0})
+            GROUP BY session_id, student_id"""
+
+# Only rollup tables live here -- the raw `students`/`attendance` tables are
+# owned by the dashboards that write them.
+ROLLUP_TABLES = [
+    "CREATE TABLE IF NOT EXISTS sessions (id INTEGER PRIMARY KEY AUTOINCREMENT, date TEXT, start_time TEXT)",
+    "CREATE TABLE IF NOT EXISTS daily_attendance (student_id INTEGER, date TEXT, first_time TEXT, last_time TEXT, marks INTEGER, PRIMARY KEY (student_id, date)) WITHOUT ROWID",
+    "CREATE TABLE IF NOT EXISTS session_attendance (session_id INTEGER, student_id INTEGER, date TEXT, first_time TEXT, marks INTEGER, PRIMARY KEY (session_id, student_id)) WITHOUT ROWID",
+    "CREATE INDEX IF NOT EXISTS idx_sessions_date ON sessions (date, start_time)",
+    "CREATE INDEX IF NOT EXISTS idx_daily_date ON daily_attendance (date)",
+    "CREATE INDEX IF NOT EXISTS idx_session_att_student ON session_attendance (student_id, date)",
+]
+
+ROLLUP_TRIGGERS = [
+    "CREATE INDEX IF NOT EXISTS idx_attendance_student_date ON attendance (student_id, date)",
+
+    # New mark -> open a session for the day if none exists yet, then roll the mark up.
+    """CREATE TRIGGER IF NOT EXISTS trg_attendance_insert AFTER INSERT ON attendance
+    BEGIN
+        INSERT INTO sessions (date, start_time)
+            SELECT NEW.date, NEW.time WHERE NOT EXISTS (SELECT 1 FROM sessions WHERE date = NEW.date);
+        INSERT INTO daily_attendance (student_id, date, first_time, last_time, marks)
+            VALUES (NEW.student_id, NEW.date, NEW.time, NEW.time, 1)
+            ON CONFLICT (student_id, date) DO UPDATE SET
+                first_time = MIN(first_time, excluded.first_time),
+                last_time = MAX(last_time, excluded.last_time),
+                marks = marks + 1;
+        INSERT INTO session_attendance (session_id, student_id, date, first_time, marks)
+            VALUES (""" + _SESSION_OF.format("NEW") + """, NEW.student_id, NEW.date, NEW.time, 1)
+            ON CONFLICT (session_id, student_id) DO UPDATE SET
+                first_time = MIN(first_time, excluded.first_time),
+                marks = marks + 1;
+    END""",
+
+    # Removed mark -> recompute just that student's day, daily and per session,
+    # from the raw rows (indexed).
+    """CREATE TRIGGER IF NOT EXISTS trg_attendance_delete AFTER DELETE ON attendance
+    BEGIN
+        DELETE FROM daily_attendance WHERE student_id = OLD.student_id AND date = OLD.date;
+        INSERT INTO daily_attendance (student_id, date, first_time, last_time, marks)
+            SELECT student_id, date, MIN(time), MAX(time), COUNT(*) FROM attendance
+            WHERE student_id = OLD.student_id AND date = OLD.date
+            GROUP BY student_id, date;
+        DELETE FROM session_attendance WHERE student_id = OLD.student_id AND date = OLD.date;
+        """ + _SESSION_ROLLUP.format("WHERE a.student_id = OLD.student_id AND a.date = OLD.date") + """;
+    END""",
+]
+
+
+def _has_table(cursor, name):
+    return cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (name,)).fetchone() is not None
+
+
+def ensure_schema(conn):
+    """Create rollup tables/triggers; (re)build them from history when outdated.
+
+    Triggers need the raw `attendance` table, so call this after the app has
+    created it. Without it only the (empty) rollup tables are created.
+    """
+    cursor = conn.cursor()
+    outdated = cursor.execute("PRAGMA user_version").fetchone()[0] < ROLLUP_VERSION
+    if outdated:
+        cursor.execute("DROP TRIGGER IF EXISTS trg_attendance_insert")
+        cursor.execute("DROP TRIGGER IF EXISTS trg_attendance_delete")
+        cursor.execute("DROP TABLE IF EXISTS daily_attendance")
+        cursor.execute("DROP TABLE IF EXISTS session_attendance")
+    for stmt in ROLLUP_TABLES:
+        cursor.execute(stmt)
+    if _has_table(cursor, "attendance"):
+        for stmt in ROLLUP_TRIGGERS:
+            cursor.execute(stmt)
+        if outdated:
+            rebuild_rollups(conn)
+            cursor.execute(f"PRAGMA user_version = {ROLLUP_VERSION}")
+    conn.commit()
+
+
+def rebuild_rollups(conn):
+    """Recompute all rollups from the raw attendance table (one-off / repair)."""
+    cursor = conn.cursor()
+    cursor.execute("DELETE FROM daily_attendance")
+    cursor.execute("DELETE FROM session_attendance")
+    # Old history has no session markers: treat each day as a single session.
+    cursor.execute("""INSERT INTO sessions (date, start_time)
+                      SELECT date, MIN(time) FROM attendance
+                      WHERE date NOT IN (SELECT date FROM sessions)
+                      GROUP BY date ORDER BY date""")
+    cursor.execute("""INSERT INTO daily_attendance (student_id, date, first_time, last_time, marks)
+                      SELECT student_id, date, MIN(time), MAX(time), COUNT(*)
+                      FROM attendance GROUP BY student_id, date""")
+    cursor.execute(_SESSION_ROLLUP.format(""))
+    conn.commit()
+
+
+def start_session(conn):
+    """Open a new class session; marks from now on count towards it.
+
+    Sessions nobody is marked in are ignored by the reports.
+    """
+    now = datetime.now()
+    cursor = conn.cursor()
+    cursor.execute("INSERT INTO sessions (date, start_time) VALUES (?, ?)",
+                   (now.strftime('%Y-%m-%d'), now.strftime('%H:%M:%S')))
+    conn.commit()
+    return cursor.lastrowid
+
+
+# --- REPORT QUERIES (rollup tables only) ---
+
+def _parse_date(value):
+    """Normalise an optional date to YYYY-MM-DD; raises ValueError on bad input."""
+    return date.fromisoformat(value).strftime("%Y-%m-%d") if value else None
+
+
+def _date_range(start, end):
+    return _parse_date(start) or "0000-00-00", _parse_date(end) or "9999-99-99"
+
+
+def student_percentages(conn, start=None, end=None):
+    start, end = _date_range(start, end)
+    cursor = conn.cursor()
+    # Only days/sessions where someone was actually marked count as held.
+    cursor.execute("SELECT COUNT(DISTINCT date) FROM daily_attendance WHERE date BETWEEN ? AND ?", (start, end))
+    class_days = cursor.fetchone()[0]
+    cursor.execute("""SELECT COUNT(*) FROM sessions s WHERE date BETWEEN ? AND ?
+                      AND EXISTS (SELECT 1 FROM session_attendance a WHERE a.session_id = s.id)""", (start, end))
+    class_sessions = cursor.fetchone()[0]
+    cursor.execute("""SELECT s.id, s.name,
+                          (SELECT COUNT(*) FROM daily_attendance d
+                           WHERE d.student_id = s.id AND d.date BETWEEN ? AND ?),
+                          (SELECT COUNT(*) FROM session_attendance a
+                           WHERE a.student_id = s.id AND a.date BETWEEN ? AND ?)
+                      FROM students s ORDER BY s.id""", (start, end, start, end))
+    report = []
+    for s_id, name, days, sessions in cursor.fetchall():
+        report.append({
+            "id": s_id, "name": name,
+            "days_present": days, "class_days": class_days,
+            "sessions_present": sessions, "class_sessions": class_sessions,
+            "percentage": round(100.0 * days / class_days, 1) if class_days else 0.0,
+        })
+    return report
+
+
+def session_headcounts(conn, start=None, end=None):
+    start, end = _date_range(start, end)
+    cursor = conn.cursor()
+    cursor.execute("""SELECT s.id, s.date, s.start_time, COUNT(a.student_id)
+                      FROM sessions s LEFT JOIN session_attendance a ON a.session_id = s.id
+                      WHERE s.date BETWEEN ? AND ?
+                      GROUP BY s.id ORDER BY s.id""", (start, end))
+    return [{"session_id": r[0], "date": r[1], "start_time": r[2], "headcount": r[3]}
+            for r in cursor.fetchall()]
+
+
+def daily_trend(conn, start=None, end=None):
+    start, end = _date_range(start, end)
+    cursor = conn.cursor()
+    cursor.execute("""SELECT date, COUNT(*) FROM daily_attendance
+                      WHERE date BETWEEN ? AND ? GROUP BY date ORDER BY date""", (start, end))
+    return [{"date": r[0], "present": r[1]} for r in cursor.fetchall()]
+
+
+def student_history(conn, s_id, start=None, end=None):
+    start, end = _date_range(start, end)
+    cursor = conn.cursor()
+    cursor.execute("""SELECT date, first_time, last_time, marks FROM daily_attendance
+                      WHERE student_id = ? AND date BETWEEN ? AND ? ORDER BY date""", (s_id, start, end))
+    return [{"date": r[0], "first_time": r[1], "last_time": r[2], "marks": r[3]}
+            for r in cursor.fetchall()]
+
+
+# --- FLASK ENDPOINTS ---
+# Query params: ?start=YYYY-MM-DD&end=YYYY-MM-DD (both optional)
+
+reports_bp = Blueprint("reports", __name__, url_prefix="/reports")
+
+
+def _init_db(state):
+    conn = sqlite3.connect(str(DB_PATH))
+    try:
+        ensure_schema(conn)
+    finally:
+        conn.close()
+
+
+reports_bp.record_once(_init_db)
+
+
+def _run(query, *args, start=None, end=None):
+    """Run a report query for the requested (or given) date range as JSON."""
+    if start is None and end is None:
+        try:
+            start, end = _parse_date(request.args.get("start")), _parse_date(request.args.get("end"))
+        except ValueError:
+            return jsonify({"error": "start/end must be dates in YYYY-MM-DD format"}), 400
+    conn = None
+    try:
+        conn = sqlite3.connect(str(DB_PATH))
+        return jsonify(query(conn, *args, start=start, end=end))
+    except sqlite3.OperationalError as err:
+        # Fresh database: the dashboard hasn't created its tables yet
+        if "no such table" in str(err): return jsonify([])
+        return jsonify({"error": f"Database unavailable: {err}"}), 503
+    finally:
+        if conn: conn.close()
+
+
+@reports_bp.route("/students")
+def report_students():
+    return _run(student_percentages)
+
+
+@reports_bp.route("/students/<int:s_id>")
+def report_student(s_id):
+    return _run(student_history, s_id)
+
+
+@reports_bp.route("/sessions")
+def report_sessions():
+    return _run(session_headcounts)
+
+
+@reports_bp.route("/trend")
+def report_trend():
+    return _run(daily_trend)
+
+
+@reports_bp.route("/today")
+def report_today():
+    today_str = date.today().strftime("%Y-%m-%d")
+    return _run(session_headcounts, start=today_str, end=today_str)
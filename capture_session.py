@@ -0,0 +1,172 @@
+# === NON-BLOCKING REGISTRATION CAPTURE ===
+# Camera + face detection run on a capture thread, JPEG encoding and disk
+# writes on a writer thread. The dashboard only polls for the latest preview
+# frame (via Tk `after`), so the UI never waits on the camera or the disk.
+# Shots are spaced by timestamps instead of cv2.waitKey() sleeps.
+
+import threading
+import queue
+import time
+import cv2
+import mediapipe as mp
+from PIL import Image
+
+
+class FaceImageWriter(threading.Thread):
+    """Background thread that encodes and saves face crops as JPEG."""
+
+    def __init__(self):
+        super().__init__(daemon=True)
+        self.jobs = queue.Queue()
+        self.written = 0
+        self.failed = 0
+
+    def put(self, path, face_img):
+        self.jobs.put((path, face_img))
+
+    def run(self):
+        while True:
+            job = self.jobs.get()
+            if job is None: break
+            path, face_img = job
+            try: ok = cv2.imwrite(str(path), face_img)
+            except cv2.error: ok = False
+            if ok: self.written += 1
+            else: self.failed += 1
+
+    def close(self):
+        """Stop once the queued images are flushed (does not wait)."""
+        self.jobs.put(None)
+
+
+class RegistrationSession:
+    """Captures face photos for one student without blocking the caller.
+
+    Call arm(n) to capture the next n photos (e.g. once per phase), poll
+    preview_image() from the UI, and stop() when finished or cancelled.
+    stop() only signals the threads; poll `finished` before reading the
+    written/failed counts.
+    """
+
+    def __init__(self, s_id, dataset_dir, start_count=0, camera_index=0,
+                 min_interval=0.15, padding=20, min_confidence=0.5):
+        self.s_id = s_id
+        self.dataset_dir = dataset_dir
+        self.next_count = start_count
+        self.camera_index = camera_index
+        self.min_interval = min_interval
+        self.padding = padding
+        self.min_confidence = min_confidence
+
+        self.saved = 0
+        self.error = None
+        self._remaining = 0
+        self._last_shot = 0.0
+        self._preview = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._writer = FaceImageWriter()
+        self._thread = threading.Thread(target=self._capture_loop, daemon=True)
+
+    # --- CONTROL (UI thread) ---
+    def start(self):
+        self._writer.start()
+        self._thread.start()
+
+    def arm(self, count):
+        with self._lock:
+            self._remaining = count
+
+    @property
+    def capturing(self):
+        with self._lock:
+            return self._remaining > 0
+
+    @property
+    def running(self):
+        return self._thread.is_alive()
+
+    @property
+    def finished(self):
+        """Camera released and every queued image written (or failed)."""
+        return not self._thread.is_alive() and not self._writer.is_alive()
+
+    @property
+    def written(self):
+        return self._writer.written
+
+    @property
+    def failed(self):
+        return self._writer.failed
+
+    def stop(self):
+        """Ask the camera thread to stop; the writer flushes and exits after it."""
+        self._stop.set()
+
+    def preview_image(self):
+        """Latest annotated frame as an RGB PIL image (or None)."""
+        with self._lock:
+            frame = self._preview
+        if frame is None: return None
+        return Image.fromarray(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
+
+    # --- CAPTURE THREAD ---
+    def _crop_face(self, frame, detection):
+        """Padded face box clipped to the frame, or None if nothing is left."""
+        bbox = detection.location_data.relative_bounding_box
+        ih, iw, _ = frame.shape
+        x, y, w, h = int(bbox.xmin * iw), int(bbox.ymin * ih), int(bbox.width * iw), int(bbox.height * ih)
+        x0, y0 = max(0, x - self.padding), max(0, y - self.padding)
+        x1, y1 = min(iw, x + w + self.padding), min(ih, y + h + self.padding)
+        if x1 <= x0 or y1 <= y0: return None
+        return (x0, y0, x1 - x0, y1 - y0)
+
+    def _capture_loop(self):
+        cap, detector = None, None
+        try:
+            cap = cv2.VideoCapture(self.camera_index)
+            detector = mp.solutions.face_detection.FaceDetection(min_detection_confidence=self.min_confidence)
+            if not cap.isOpened():
+                self.error = f"Could not open camera {self.camera_index}"
+                return
+            while not self._stop.is_set():
+                ret, frame = cap.read()
+                if not ret:
+                    self.error = "Camera stopped sending frames"
+                    break
+                frame = cv2.flip(frame, 1)
+                res = detector.process(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
+                now = time.monotonic()
+
+                with self._lock:
+                    remaining = self._remaining
+                due = remaining > 0 and now - self._last_shot >= self.min_interval
+                raw = frame.copy() if due else None  # crops must not include drawn boxes
+                for detection in res.detections or []:
+                    box = self._crop_face(frame, detection)
+                    if not box: continue
+                    x, y, w, h = box
+                    color = (0, 255, 255)
+                    if due:
+                        # One photo per shot: the first usable face in the frame
+                        face = cv2.cvtColor(raw[y:y+h, x:x+w], cv2.COLOR_BGR2GRAY)
+                        self._writer.put(self.dataset_dir / f"User.{self.s_id}.{self.next_count}.jpg", face)
+                        self.next_count += 1
+                        self.saved += 1
+                        self._last_shot = now
+                        with self._lock:
+                            self._remaining -= 1
+                        due = False
+                        color = (0, 255, 0)
+                    cv2.rectangle(frame, (x, y), (x+w, y+h), color, 2)
+                    cv2.putText(frame, f"Saved: {self.saved}", (x, y-10), cv2.FONT_HERSHEY_SIMPLEX, 0.6, color, 2)
+
+                with self._lock:
+                    self._preview = frame
+        except Exception as err:
+            self.error = str(err)
+        finally:
+            if cap is not None: cap.release()
+            if detector is not None: detector.close()
+            # Nothing more will be queued: let the writer finish and exit
+            self._writer.close()
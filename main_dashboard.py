@@ -5,11 +5,13 @@ import mediapipe as mp
 import os
 import csv
 import numpy as np
-from PIL import Image
+from PIL import Image, ImageTk
 from datetime import datetime
 from pathlib import Path
 import sqlite3
 import time
+from attendance_reports import ensure_schema, start_session
+from capture_session import RegistrationSession
 
 # --- SETTINGS ---
 CONFIDENCE_THRESHOLD = 65  
@@ -36,6 +38,7 @@ class AttendanceDashboard:
         self.root.configure(bg="#2c3e50")
 
         self.already_marked = set()
+        self.registration = None
         self.init_db()
 
         # HEADER
@@ -63,11 +66,13 @@ class AttendanceDashboard:
             self.cursor.execute("CREATE TABLE IF NOT EXISTS students (id INTEGER PRIMARY KEY, name TEXT)")
             self.cursor.execute("CREATE TABLE IF NOT EXISTS attendance (id INTEGER PRIMARY KEY AUTOINCREMENT, student_id INTEGER, name TEXT, time TEXT, date TEXT, method TEXT)")
             self.conn.commit()
+            ensure_schema(self.conn)
         except Exception as err:
             messagebox.showerror("Database Error", f"Error creating database: {err}")
 
     def start_new_class(self):
         self.already_marked.clear()
+        start_session(self.conn)
         self.log_separator_csv()
         messagebox.showinfo("New Class", "Session Reset!")
 
@@ -76,8 +81,16 @@ class AttendanceDashboard:
             writer = csv.writer(f)
             writer.writerow(["---", "NEW CLASS STARTED", datetime.now().strftime('%H:%M:%S'), "---", "---"])
 
+    def registration_busy(self):
+        """Camera and dataset/ belong to the registration until it finishes."""
+        if self.registration:
+            messagebox.showwarning("Busy", "Finish the current student registration first.")
+            return True
+        return False
+
     # --- 1. REGISTER (Updated with Conflict Check & Append Mode) ---
     def register_student(self):
+        if self.registration_busy(): return
         s_id = simpledialog.askinteger("Input", "Enter Student ID (Number):", parent=self.root)
         if not s_id: return
         s_name = simpledialog.askstring("Input", "Enter Student Name:", parent=self.root)
@@ -125,52 +138,58 @@ class AttendanceDashboard:
             self.conn.commit()
         except: pass
         
-        mp_face = mp.solutions.face_detection
-        detector = mp_face.FaceDetection(min_detection_confidence=0.5)
-        cap = cv2.VideoCapture(0)
-        
-        current_pic = start_count
-        
-        while True:
-            ret, frame = cap.read()
-            if not ret: break
-            
-            frame = cv2.flip(frame, 1)
-            rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            results = detector.process(rgb)
-            
-            if results.detections:
-                for detection in results.detections:
-                    bboxC = detection.location_data.relative_bounding_box
-                    ih, iw, _ = frame.shape
-                    x, y, w, h = int(bboxC.xmin * iw), int(bboxC.ymin * ih), int(bboxC.width * iw), int(bboxC.height * ih)
-                    
-                    padding = 20
-                    x, y = max(0, x - padding), max(0, y - padding)
-                    w, h = w + (padding*2), h + (padding*2)
-                    if x+w > iw or y+h > ih: continue
+        session = RegistrationSession(s_id, DATASET_DIR, start_count=start_count, camera_index=0, padding=20)
+        session.start()
+        session.arm(target_count - start_count)
+        self.registration = session
+
+        win = tk.Toplevel(self.root)
+        win.title("Registering - TURN HEAD SLOWLY")
+        win.configure(bg="#2c3e50")
+        preview = tk.Label(win, bg="#2c3e50")
+        preview.pack(padx=10, pady=10)
+        progress = tk.Label(win, text="Starting camera...", bg="#2c3e50", fg="white", font=("Arial", 12))
+        progress.pack(pady=5)
+        tk.Button(win, text="Stop", bg="#c0392b", fg="white", font=("Arial", 12), width=15, command=lambda: finish()).pack(pady=10)
+
+        def finish():
+            if not win.winfo_exists(): return
+            win.destroy()
+            session.stop()
+            self.status_label.config(text=f"Saving photos for {s_name}...")
+            wait_done()
+
+        def wait_done():
+            # Camera release and JPEG flush happen off the Tk thread
+            if not session.finished:
+                self.root.after(50, wait_done)
+                return
+            self.registration = None
+            written, wanted = session.written, target_count - start_count
+            self.status_label.config(text=f"Registered: {s_name} ({written} photos)")
+            problems = []
+            if session.error: problems.append(f"Camera error: {session.error}")
+            if session.failed: problems.append(f"{session.failed} photos could not be saved.")
+            if written < wanted: problems.append(f"Only {written} of {wanted} photos were captured.")
+            if problems:
+                messagebox.showwarning("Registration Incomplete", "\n".join(problems) + f"\n\nRegister {s_name} again to add more photos.")
+            else:
+                messagebox.showinfo("Success", f"Added {written} new photos for {s_name}!\nTotal photos: {start_count + written - 1}\n\nDon't forget to click 'Train Model'.")
+
+        def poll():
+            if not win.winfo_exists(): return
+            frame = session.preview_image()
+            if frame is not None:
+                preview.image = ImageTk.PhotoImage(frame)
+                preview.config(image=preview.image)
+                progress.config(text=f"Saved {session.saved}/{target_count - start_count}")
+            if not session.capturing or not session.running:
+                finish()
+                return
+            win.after(30, poll)
 
-                    face_img = frame[y:y+h, x:x+w]
-                    
-                    if face_img.size > 0:
-                        filename = DATASET_DIR / f"User.{s_id}.{current_pic}.jpg"
-                        cv2.imwrite(str(filename), cv2.cvtColor(face_img, cv2.COLOR_BGR2GRAY))
-                        
-                        cv2.rectangle(frame, (x, y), (x+w, y+h), (0, 255, 0), 2)
-                        cv2.putText(frame, f"Saved: {current_pic}", (x, y-10), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 0), 2)
-                        
-                        current_pic += 1
-                        cv2.waitKey(150) # Delay for angles
-
-            cv2.imshow("Registering - TURN HEAD SLOWLY", frame)
-            
-            if current_pic >= target_count or cv2.waitKey(1) == ord('q'):
-                break
-        
-        cap.release()
-        cv2.destroyAllWindows()
-        detector.close()
-        messagebox.showinfo("Success", f"Added 50 new photos for {s_name}!\nTotal photos: {current_pic - 1}\n\nDon't forget to click 'Train Model'.")
+        win.protocol("WM_DELETE_WINDOW", finish)
+        poll()
 
     def get_student_name_by_id(self, s_id):
         # Check CSV first
@@ -203,6 +222,7 @@ class AttendanceDashboard:
 
     # --- 2. TRAIN ---
     def train_model(self):
+        if self.registration_busy(): return
         recognizer = cv2.face.LBPHFaceRecognizer_create()
         image_paths = [os.path.join(DATASET_DIR, f) for f in os.listdir(DATASET_DIR)]
         face_samples = []
@@ -227,6 +247,7 @@ class AttendanceDashboard:
 
     # --- 3. ATTENDANCE ---
     def start_attendance_your_code(self):
+        if self.registration_busy(): return
         if not os.path.exists(TRAINER_FILE):
             messagebox.showerror("Error", "Trainer file missing!")
             return
@@ -13,6 +13,8 @@ import sqlite3
 import threading 
 import socket
 from flask import Flask, render_template
+from attendance_reports import ensure_schema, start_session, reports_bp
+from capture_session import RegistrationSession
 
 # --- ABSOLUTE PATH SETTINGS ---
 BASE_DIR = Path(__file__).resolve().parent
@@ -25,6 +27,7 @@ DATASET_DIR.mkdir(parents=True, exist_ok=True)
 
 # --- WEB SERVER ---
 app_flask = Flask(__name__)
+app_flask.register_blueprint(reports_bp)
 
 @app_flask.route("/attendance")
 def attendance_today():
@@ -49,6 +52,7 @@ class AttendanceSystem(ctk.CTk):
         self.configure(fg_color="#1a1c1e")
         
         self.session_marked = set()
+        self.registration = None
         self.init_db()
         
         # --- SIDEBAR (CSV REMOVED) ---
@@ -80,6 +84,7 @@ class AttendanceSystem(ctk.CTk):
         self.cursor.execute("CREATE TABLE IF NOT EXISTS students (id INTEGER PRIMARY KEY, name TEXT, reg_date TEXT)")
         self.cursor.execute("CREATE TABLE IF NOT EXISTS attendance (id INTEGER PRIMARY KEY AUTOINCREMENT, student_id INTEGER, name TEXT, time TEXT, date TEXT)")
         self.conn.commit()
+        ensure_schema(self.conn)
 
     def mark_pres(self, s_id, name):
         """Core function to save attendance to DB and CSV"""
@@ -120,12 +125,21 @@ class AttendanceSystem(ctk.CTk):
 
     def start_new_session(self):
         self.session_marked.clear()
+        start_session(self.conn)
         tm = datetime.now().strftime('%H:%M:%S')
         with open(ATTENDANCE_FILE, 'a', newline='') as f:
             csv.writer(f).writerow(["---", "NEW SESSION STARTED", tm, "---"])
         messagebox.showinfo("Session", "New session started. You can now re-mark students.")
 
+    def registration_busy(self):
+        """Camera and dataset/ belong to the registration until it finishes."""
+        if self.registration:
+            messagebox.showwarning("Busy", "Finish the current student registration first.")
+            return True
+        return False
+
     def register_student(self):
+        if self.registration_busy(): return
         s_id = ctk.CTkInputDialog(text="Enter unique ID:", title="Register").get_input()
         s_name = ctk.CTkInputDialog(text="Enter full Name:", title="Register").get_input()
         if not s_id or not s_name: return
@@ -134,43 +148,77 @@ class AttendanceSystem(ctk.CTk):
                         (int(s_id), s_name, date.today().strftime('%Y-%m-%d')))
         self.conn.commit()
 
-        cap = cv2.VideoCapture(1)
-        detector = mp.solutions.face_detection.FaceDetection()
-        total_captured = 0
-        
-        for phase in ["NO MASK", "WITH MASK"]:
-            messagebox.showinfo("Register", f"Phase: {phase}\nPress 'C' to start taking 25 photos.")
-            p_count = 0
-            while p_count < 25:
-                ret, frame = cap.read()
-                frame = cv2.flip(frame, 1)
-                cv2.putText(frame, f"{phase}: Press 'C'", (20, 40), 1, 1.5, (0, 255, 255), 2)
-                cv2.imshow("Registering...", frame)
-                if cv2.waitKey(1) == ord('c'):
-                    while p_count < 25:
-                        ret, frame = cap.read()
-                        frame = cv2.flip(frame, 1)
-                        res = detector.process(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
-                        if res.detections:
-                            for det in res.detections:
-                                bbox = det.location_data.relative_bounding_box
-                                ih, iw, _ = frame.shape
-                                x, y, w, h = int(bbox.xmin*iw), int(bbox.ymin*ih), int(bbox.width*iw), int(bbox.height*ih)
-                                face = cv2.cvtColor(frame[max(0,y):y+h, max(0,x):x+w], cv2.COLOR_BGR2GRAY)
-                                if face.size > 0:
-                                    cv2.imwrite(str(DATASET_DIR / f"User.{s_id}.{total_captured}.jpg"), face)
-                                    p_count += 1
-                                    total_captured += 1
-                                    cv2.rectangle(frame, (x,y), (x+w, y+h), (0, 255, 0), 2)
-                                    cv2.putText(frame, f"Saved: {p_count}/25", (x, y-10), 1, 1.2, (0, 255, 0), 2)
-                                    cv2.imshow("Registering...", frame)
-                                    cv2.waitKey(250)
-                        if cv2.waitKey(1) == ord('q'): break
-            if cv2.waitKey(1) == ord('q'): break
-        cap.release(); cv2.destroyAllWindows()
-        messagebox.showinfo("Success", f"Registered {s_name} (ID: {s_id})")
+        session = RegistrationSession(s_id, DATASET_DIR, camera_index=1, min_interval=0.25, padding=0)
+        session.start()
+        self.registration = session
+        phases = ["NO MASK", "WITH MASK"]
+        state = {"phase": 0, "armed": False}
+
+        win = ctk.CTkToplevel(self)
+        win.title("Registering...")
+        win.attributes("-topmost", True)
+        preview = ctk.CTkLabel(win, text="Starting camera...")
+        preview.pack(padx=10, pady=10)
+        progress = ctk.CTkLabel(win, text=f"Phase: {phases[0]} | Press 'Capture' to take 25 photos", font=("Arial", 14))
+        progress.pack(pady=5)
+        capture_btn = ctk.CTkButton(win, text="Capture", fg_color="#27ae60", height=40, command=lambda: start_phase())
+        capture_btn.pack(side="left", padx=20, pady=10, expand=True)
+        ctk.CTkButton(win, text="Stop", fg_color="#c0392b", height=40, command=lambda: finish()).pack(side="right", padx=20, pady=10, expand=True)
+
+        def start_phase():
+            session.arm(25)
+            state["armed"] = True
+            capture_btn.configure(state="disabled")
+
+        def finish():
+            if not win.winfo_exists(): return
+            win.destroy()
+            session.stop()
+            self.status_bar.configure(text=f"Saving photos for {s_name} ({s_id})...")
+            wait_done()
+
+        def wait_done():
+            # Camera release and JPEG flush happen off the Tk thread
+            if not session.finished:
+                self.after(50, wait_done)
+                return
+            self.registration = None
+            written, wanted = session.written, 25 * len(phases)
+            self.status_bar.configure(text=f"Registered: {s_name} ({s_id}) | {written} photos saved")
+            problems = []
+            if session.error: problems.append(f"Camera error: {session.error}")
+            if session.failed: problems.append(f"{session.failed} photos could not be saved.")
+            if written < wanted: problems.append(f"Only {written} of {wanted} photos were captured.")
+            if problems:
+                messagebox.showwarning("Registration Incomplete", "\n".join(problems))
+            else:
+                messagebox.showinfo("Success", f"Registered {s_name} (ID: {s_id})")
+
+        def poll():
+            if not win.winfo_exists(): return
+            frame = session.preview_image()
+            if frame is not None:
+                preview.configure(image=ctk.CTkImage(frame, size=frame.size), text="")
+            phase = phases[state["phase"]]
+            if state["armed"] and not session.capturing:
+                # Phase complete: move on, or close once the last one is done
+                state["armed"] = False
+                state["phase"] += 1
+                if state["phase"] >= len(phases): return finish()
+                capture_btn.configure(state="normal")
+                phase = phases[state["phase"]]
+            if state["armed"]:
+                progress.configure(text=f"Phase: {phase} | Saved: {session.saved}/{25 * len(phases)}")
+            else:
+                progress.configure(text=f"Phase: {phase} | Press 'Capture' to take 25 photos")
+            if not session.running: return finish()
+            win.after(30, poll)
+
+        win.protocol("WM_DELETE_WINDOW", finish)
+        poll()
 
     def train_model(self):
+        if self.registration_busy(): return
         recognizer = cv2.face.LBPHFaceRecognizer_create()
         faces, ids = [], []
         image_paths = [os.path.join(DATASET_DIR, f) for f in os.listdir(DATASET_DIR) if f.endswith(".jpg")]
@@ -211,6 +259,7 @@ class AttendanceSystem(ctk.CTk):
                 load_list()
 
         def del_std(i):
+            if self.registration_busy(): return
             if messagebox.askyesno("Confirm", "Delete records and photos?"):
                 self.cursor.execute("DELETE FROM students WHERE id=?", (i,))
                 self.cursor.execute("DELETE FROM attendance WHERE student_id=?", (i,))
@@ -221,6 +270,7 @@ class AttendanceSystem(ctk.CTk):
         load_list()
 
     def start_camera(self):
+        if self.registration_busy(): return
         if not os.path.exists(TRAINER_FILE): return messagebox.showerror("Error", "Train model first!")
         recognizer = cv2.face.LBPHFaceRecognizer_create()
         recognizer.read(str(TRAINER_FILE))
@@ -257,10 +307,13 @@ class AttendanceSystem(ctk.CTk):
             ip = s.getsockname()[0]; s.close()
         except: ip = "127.0.0.1"
         link = f"http://{ip}:5001/attendance"
+        reports_link = f"http://{ip}:5001/reports/students"
         threading.Thread(target=lambda: app_flask.run(host="0.0.0.0", port=5001, debug=False, use_reloader=False), daemon=True).start()
-        win = ctk.CTkToplevel(self); win.title("Web Server Active"); win.geometry("400x200"); win.attributes("-topmost", True)
+        win = ctk.CTkToplevel(self); win.title("Web Server Active"); win.geometry("400x300"); win.attributes("-topmost", True)
         ctk.CTkLabel(win, text="Phone URL:").pack(pady=20)
         entry = ctk.CTkEntry(win, width=350); entry.insert(0, link); entry.configure(state="readonly"); entry.pack(pady=10)
+        ctk.CTkLabel(win, text="Reports (JSON):").pack(pady=(10, 0))
+        r_entry = ctk.CTkEntry(win, width=350); r_entry.insert(0, reports_link); r_entry.configure(state="readonly"); r_entry.pack(pady=10)
 
 if __name__ == "__main__":
     app = AttendanceSystem()
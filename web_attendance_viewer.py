@@ -5,12 +5,14 @@ from flask import Flask, render_template
 import csv
 import os
 from datetime import date, datetime
+from attendance_reports import reports_bp
 
 app = Flask(__name__)
+app.register_blueprint(reports_bp)
 
 @app.route("/")
 def home():
-    return "<h2>Attendance Viewer Running</h2><br>Go to <a href='/attendance'>/attendance</a>"
+    return "<h2>Attendance Viewer Running</h2><br>Go to <a href='/attendance'>/attendance</a> or <a href='/reports/students'>/reports/students</a>"
 
 @app.route("/attendance")
 def attendance_today():
@@ -68,6 +70,7 @@ if __name__ == "__main__":
     print("\n🚀 Web Attendance Viewer Started")
     print("👉 Session Logic: Synced with CSV 'New Class' marker.")
     print("\n📲 To check on Mobile (same WiFi):")
-    print("   http://YOUR-LAPTOP-IP:5001/attendance\n")
+    print("   http://YOUR-LAPTOP-IP:5001/attendance")
+    print("   http://YOUR-LAPTOP-IP:5001/reports/students\n")
 
     app.run(host="0.0.0.0", debug=True, port=5001)
\ No newline at end of file